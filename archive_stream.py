@@ -0,0 +1,169 @@
+import io
+import logging
+import os
+import shutil
+import tarfile
+import zipfile
+from typing import Callable, Iterable, Optional
+
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+ZIP_SUFFIXES = (".zip",)
+# Read size for zip entries fetched over HTTP ranges; each buffer fill is one request
+ZIP_RANGE_BUFFER = 16 * 1024 * 1024
+
+
+def local_path(root: str, filename: str) -> str:
+    """Join a repo or archive member filename onto root, refusing paths that escape it"""
+    path = os.path.normpath(os.path.join(root, filename))
+    if os.path.commonpath([os.path.abspath(root), os.path.abspath(path)]) != os.path.abspath(root):
+        raise ValueError(f"Refusing to write outside {root}: {filename}")
+    return path
+
+
+def archive_type(filename: str) -> Optional[str]:
+    lower = filename.lower()
+    if lower.endswith(TAR_SUFFIXES):
+        return "tar"
+    if lower.endswith(ZIP_SUFFIXES):
+        return "zip"
+    return None
+
+
+def extraction_dir(filepath: str) -> str:
+    """Directory an archive is unpacked into.
+
+    The suffix keeps it from colliding with repo directories, since the
+    directory is replaced wholesale on every extraction.
+    """
+    return filepath + ".extracted"
+
+
+def _member_path(staging: str, name: str) -> Optional[str]:
+    try:
+        return local_path(staging, name)
+    except ValueError:
+        logging.warning(f"Skipping archive member outside the extraction directory: {name}")
+        return None
+
+
+class ChunkReader(io.RawIOBase):
+    """File-like view over an iterator of byte chunks, optionally copying them to a file"""
+
+    def __init__(self, chunks: Iterable[bytes], copy_to=None,
+                 on_read: Optional[Callable[[int], None]] = None):
+        self._chunks = iter(chunks)
+        self._buffer = memoryview(b"")
+        self._copy_to = copy_to
+        self._on_read = on_read
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            if self._copy_to:
+                self._copy_to.write(chunk)
+            if self._on_read:
+                self._on_read(len(chunk))
+            self._buffer = memoryview(chunk)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+class RangeReader(io.RawIOBase):
+    """Seekable file-like object that reads a remote file through range requests"""
+
+    def __init__(self, fetch_range: Callable[[int, int], bytes], size: int,
+                 on_read: Optional[Callable[[int], None]] = None):
+        self._fetch_range = fetch_range
+        self._size = size
+        self._pos = 0
+        self._on_read = on_read
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def readinto(self, b):
+        if self._pos >= self._size or not len(b):
+            return 0
+        end = min(self._pos + len(b), self._size) - 1
+        data = self._fetch_range(self._pos, end)
+        n = len(data)
+        b[:n] = data
+        self._pos += n
+        if self._on_read:
+            self._on_read(n)
+        return n
+
+
+def _replace_dir(staging: str, dest: str):
+    if os.path.isdir(dest):
+        shutil.rmtree(dest)
+    os.replace(staging, dest)
+
+
+def extract_tar_stream(fileobj, dest: str):
+    """Unpack a tar stream sequentially into dest, skipping links, special files and escaping paths"""
+    staging = dest + ".part"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+            for member in tar:
+                if not (member.isdir() or member.isfile()):
+                    logging.warning(f"Skipping non-regular archive member: {member.name}")
+                    continue
+                target = _member_path(staging, member.name)
+                if target is None:
+                    continue
+                if member.isdir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with tar.extractfile(member) as src, open(target, "wb") as out:
+                    shutil.copyfileobj(src, out, 1024 * 1024)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _replace_dir(staging, dest)
+
+
+def extract_zip(fileobj, dest: str):
+    staging = dest + ".part"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    try:
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                target = _member_path(staging, info.filename)
+                if target is None:
+                    continue
+                if info.is_dir():
+                    os.makedirs(target, exist_ok=True)
+                    continue
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with archive.open(info) as src, open(target, "wb") as out:
+                    shutil.copyfileobj(src, out, 1024 * 1024)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    _replace_dir(staging, dest)
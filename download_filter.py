@@ -0,0 +1,77 @@
+from fnmatch import fnmatch
+from typing import Dict, List, Optional
+
+# Weight formats in the order they are tried when the preferred one is missing
+WEIGHT_FORMATS = {
+    "safetensors": ["*.safetensors", "*.safetensors.index.json"],
+    "pytorch": ["*.bin", "*.bin.index.json", "*.pt", "*.pth", "*.ckpt"],
+    "tensorflow": ["*.h5", "*.h5.index.json", "*.tflite"],
+    "flax": ["*.msgpack", "*.msgpack.index.json"],
+    "onnx": ["*.onnx", "*.onnx_data", "*.onnx.data"],
+    "gguf": ["*.gguf"],
+    "rust": ["*.ot"],
+    "coreml": ["*.mlmodel", "*.mlpackage/*"],
+    "openvino": ["openvino*.xml", "openvino*.bin"],
+}
+# Files that share a weight extension but hold no weights; they are kept like configs
+NON_WEIGHT_FILES = ["training_args.bin"]
+FORMAT_CHOICES = ["safetensors", "pytorch", "tensorflow", "flax", "onnx", "gguf", "all"]
+
+
+def parse_patterns(text: str) -> List[str]:
+    """Split a comma separated pattern list as typed in the download options"""
+    return [p.strip() for p in text.split(",") if p.strip()]
+
+
+def matches(filename: str, patterns: List[str]) -> bool:
+    basename = filename.rsplit("/", 1)[-1]
+    return any(fnmatch(filename, p) or fnmatch(basename, p) for p in patterns)
+
+
+def weight_format(filename: str) -> Optional[str]:
+    if matches(filename, NON_WEIGHT_FILES):
+        return None
+    # OpenVINO ships its weights as .bin, so check it before pytorch
+    if matches(filename, WEIGHT_FORMATS["openvino"]):
+        return "openvino"
+    for name, patterns in WEIGHT_FORMATS.items():
+        if matches(filename, patterns):
+            return name
+    return None
+
+
+def select_files(files: List[Dict], include: Optional[List[str]] = None,
+                 exclude: Optional[List[str]] = None,
+                 preferred_format: str = "safetensors") -> List[Dict]:
+    """Filter repo files by include/exclude globs, then keep one weight format per weight set.
+
+    Files that are not weights (configs, tokenizers, READMEs) are always kept
+    unless excluded. Among weight files only the preferred format survives,
+    falling back through WEIGHT_FORMATS order when a weight set does not ship
+    it. A repo with top-level weights is a single set, as its subfolders
+    (`onnx/`, `original/`) hold copies of them. In a diffusers pipeline, or a
+    repo without top-level weights, each top-level folder is a set of its
+    own, so a `unet/` shipped only as .bin is kept beside a safetensors
+    `text_encoder/`.
+    """
+    selected = [f for f in files
+                if (not include or matches(f["rfilename"], include))
+                and not (exclude and matches(f["rfilename"], exclude))]
+    if preferred_format == "all":
+        return selected
+    formats = {f["rfilename"]: weight_format(f["rfilename"]) for f in selected}
+    per_folder = (any(f["rfilename"] == "model_index.json" for f in files)
+                  or all("/" in name for name, fmt in formats.items() if fmt))
+
+    def weight_set(filename: str) -> str:
+        return filename.partition("/")[0] if per_folder and "/" in filename else ""
+
+    available = {}
+    for name, fmt in formats.items():
+        if fmt:
+            available.setdefault(weight_set(name), set()).add(fmt)
+    order = [preferred_format] + [name for name in WEIGHT_FORMATS if name != preferred_format]
+    chosen = {key: next(name for name in order if name in fmts)
+              for key, fmts in available.items()}
+    return [f for f in selected if formats[f["rfilename"]] is None
+            or formats[f["rfilename"]] == chosen[weight_set(f["rfilename"])]]
@@ -1,17 +1,32 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLineEdit, QPushButton, QListWidget, QLabel, 
-                             QComboBox, QFileDialog, QProgressBar, QMessageBox,
-                             QTabWidget, QFormLayout, QTextEdit, QGroupBox)
+                             QComboBox, QFileDialog, QProgressBar, QMessageBox, QListWidgetItem,
+                             QTabWidget, QFormLayout, QTextEdit, QGroupBox, QCheckBox,
+                             QSpinBox)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QFont, QPalette, QColor
+from download_filter import FORMAT_CHOICES, parse_patterns
+from mirror_server import DEFAULT_MIRROR_HOST, DEFAULT_MIRROR_PORT
+
+def format_size(num_bytes):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
 
 class MainWindow(QMainWindow):
     theme_signal = pyqtSignal(str)
     search_signal = pyqtSignal(str, dict)
-    download_signal = pyqtSignal(str, str)
+    plan_signal = pyqtSignal(str, dict)
+    download_signal = pyqtSignal(dict, str)
+    sync_signal = pyqtSignal(str, bool)
     api_key_signal = pyqtSignal(str)
     default_dir_signal = pyqtSignal(str)
+    endpoint_signal = pyqtSignal(str, str)
+    mirror_signal = pyqtSignal(bool, str, int)
     inference_signal = pyqtSignal(str, str)
+    inspect_signal = pyqtSignal(str)
 
     def __init__(self):
         self.current_theme = "light"
@@ -86,14 +101,56 @@ class MainWindow(QMainWindow):
         filter_layout.addWidget(self.library_filter)
         search_layout.addLayout(filter_layout)
 
+        results_layout = QHBoxLayout()
         self.results_list = QListWidget()
-        search_layout.addWidget(self.results_list)
+        results_layout.addWidget(self.results_list, 2)
+
+        details_group = QGroupBox("Model Details")
+        details_layout = QVBoxLayout()
+        self.inspect_button = QPushButton("Inspect Selected")
+        self.inspect_button.setToolTip("Read safetensors headers to estimate size without downloading")
+        self.inspect_button.clicked.connect(self.on_inspect)
+        self.details_text = QTextEdit()
+        self.details_text.setReadOnly(True)
+        details_layout.addWidget(self.inspect_button)
+        details_layout.addWidget(self.details_text)
+        details_group.setLayout(details_layout)
+        results_layout.addWidget(details_group, 1)
+        search_layout.addLayout(results_layout)
+
+        options_layout = QHBoxLayout()
+        self.include_input = QLineEdit()
+        self.include_input.setPlaceholderText("Include, e.g. *.json, *.safetensors")
+        self.exclude_input = QLineEdit()
+        self.exclude_input.setPlaceholderText("Exclude, e.g. *.md, original/*")
+        self.format_selector = QComboBox()
+        self.format_selector.addItems(FORMAT_CHOICES)
+        self.format_selector.setToolTip("Weight format to keep when a repo ships several; 'all' keeps everything")
+        options_layout.addWidget(QLabel("Include:"))
+        options_layout.addWidget(self.include_input)
+        options_layout.addWidget(QLabel("Exclude:"))
+        options_layout.addWidget(self.exclude_input)
+        options_layout.addWidget(QLabel("Format:"))
+        options_layout.addWidget(self.format_selector)
+        self.extract_checkbox = QCheckBox("Extract archives")
+        self.extract_checkbox.setToolTip("Unpack .tar/.tar.gz/.zip files while they download")
+        self.keep_archive_checkbox = QCheckBox("Keep archive")
+        self.keep_archive_checkbox.setChecked(True)
+        options_layout.addWidget(self.extract_checkbox)
+        options_layout.addWidget(self.keep_archive_checkbox)
+        search_layout.addLayout(options_layout)
 
         download_layout = QHBoxLayout()
         self.download_button = QPushButton("Download Selected")
         self.download_button.clicked.connect(self.on_download)
         self.progress_bar = QProgressBar()
+        self.sync_button = QPushButton("Sync Downloaded Model...")
+        self.sync_button.setToolTip("Fetch only files that changed since the model was downloaded")
+        self.sync_button.clicked.connect(self.on_sync)
+        self.archive_checkbox = QCheckBox("Archive removed files")
         download_layout.addWidget(self.download_button)
+        download_layout.addWidget(self.sync_button)
+        download_layout.addWidget(self.archive_checkbox)
         download_layout.addWidget(self.progress_bar)
         search_layout.addLayout(download_layout)
 
@@ -127,6 +184,42 @@ class MainWindow(QMainWindow):
         download_dir_group.setLayout(download_dir_layout)
         settings_layout.addWidget(download_dir_group)
 
+        endpoint_group = QGroupBox("Hub Endpoint")
+        endpoint_layout = QFormLayout()
+        self.endpoint_input = QLineEdit()
+        self.endpoint_input.setPlaceholderText("https://huggingface.co")
+        self.mirror_url_input = QLineEdit()
+        self.mirror_url_input.setPlaceholderText("http://workstation:8088 (optional)")
+        self.mirror_url_input.setToolTip("Peer that supplies file contents it holds unchanged; file lists, revisions and search always come from the Hub")
+        self.endpoint_save = QPushButton("Save Endpoint")
+        self.endpoint_save.clicked.connect(self.save_endpoint)
+        endpoint_layout.addRow("Hub Endpoint:", self.endpoint_input)
+        endpoint_layout.addRow("LAN Mirror:", self.mirror_url_input)
+        endpoint_layout.addRow(self.endpoint_save)
+        endpoint_group.setLayout(endpoint_layout)
+        settings_layout.addWidget(endpoint_group)
+
+        mirror_group = QGroupBox("Mirror Server")
+        mirror_layout = QFormLayout()
+        self.mirror_host_input = QLineEdit(DEFAULT_MIRROR_HOST)
+        self.mirror_host_input.setToolTip("Use 127.0.0.1 to serve only this machine, or one LAN interface address")
+        self.mirror_port_input = QSpinBox()
+        self.mirror_port_input.setRange(1, 65535)
+        self.mirror_port_input.setValue(DEFAULT_MIRROR_PORT)
+        self.mirror_checkbox = QCheckBox("Serve downloaded models to other instances")
+        self.mirror_checkbox.toggled.connect(self.toggle_mirror)
+        self.mirror_status = QLabel("Not serving")
+        mirror_warning = QLabel("Anyone who can reach this address and port can download the models "
+                                "you serve, without an API key. Gated and private models are never served.")
+        mirror_warning.setWordWrap(True)
+        mirror_layout.addRow(mirror_warning)
+        mirror_layout.addRow("Bind Address:", self.mirror_host_input)
+        mirror_layout.addRow("Port:", self.mirror_port_input)
+        mirror_layout.addRow(self.mirror_checkbox)
+        mirror_layout.addRow(self.mirror_status)
+        mirror_group.setLayout(mirror_layout)
+        settings_layout.addWidget(mirror_group)
+
         theme_group = QGroupBox("Theme")
         theme_layout = QFormLayout()
         self.theme_selector = QComboBox()
@@ -184,7 +277,44 @@ class MainWindow(QMainWindow):
         model_id = selected_items[0].text()
         download_dir = self.download_dir_input.text() or QFileDialog.getExistingDirectory(self, "Select Download Directory")
         if download_dir:
-            self.download_signal.emit(model_id, download_dir)
+            self.pending_download_dir = download_dir
+            options = {
+                "include": parse_patterns(self.include_input.text()),
+                "exclude": parse_patterns(self.exclude_input.text()),
+                "preferred_format": self.format_selector.currentText(),
+                "extract_archives": self.extract_checkbox.isChecked(),
+                "keep_archives": self.keep_archive_checkbox.isChecked()
+            }
+            self.plan_signal.emit(model_id, options)
+
+    def confirm_download(self, plan):
+        if not plan["files"]:
+            QMessageBox.warning(self, "Nothing to Download", "No files match the download options.")
+            return
+        message = (f"Download {len(plan['files'])} files ({format_size(plan['total_bytes'])}) "
+                   f"from {plan['model_id']}?")
+        if plan["mirrored_bytes"]:
+            message += f"\n\n{format_size(plan['mirrored_bytes'])} will come from the LAN mirror."
+        if plan["skipped_files"]:
+            message += (f"\n\nSkipping {plan['skipped_files']} files "
+                        f"({format_size(plan['skipped_bytes'])}) filtered out by the download options.")
+        reply = QMessageBox.question(self, "Confirm Download", message)
+        if reply == QMessageBox.StandardButton.Yes:
+            self.download_signal.emit(plan, self.pending_download_dir)
+
+    def on_sync(self):
+        model_dir = QFileDialog.getExistingDirectory(self, "Select Downloaded Model", self.download_dir_input.text())
+        if model_dir:
+            self.sync_signal.emit(model_dir, self.archive_checkbox.isChecked())
+
+    def on_inspect(self):
+        selected_items = self.results_list.selectedItems()
+        if not selected_items:
+            QMessageBox.warning(self, "No Selection", "Please select a model to inspect.")
+            return
+        model_id = selected_items[0].text()
+        self.details_text.setPlainText(f"Inspecting {model_id}...")
+        self.inspect_signal.emit(model_id)
 
     def save_api_key(self):
         api_key = self.api_key_input.text()
@@ -201,6 +331,24 @@ class MainWindow(QMainWindow):
         self.default_dir_signal.emit(download_dir)
         QMessageBox.information(self, "Directory Saved", "Your default download directory has been saved.")
         
+    def save_endpoint(self):
+        self.endpoint_signal.emit(self.endpoint_input.text().strip(), self.mirror_url_input.text().strip())
+        QMessageBox.information(self, "Endpoint Saved", "Your Hub endpoint settings have been saved.")
+
+    def toggle_mirror(self, enabled):
+        self.mirror_host_input.setEnabled(not enabled)
+        self.mirror_port_input.setEnabled(not enabled)
+        self.mirror_signal.emit(enabled, self.mirror_host_input.text().strip() or DEFAULT_MIRROR_HOST,
+                                self.mirror_port_input.value())
+
+    def set_mirror_status(self, serving, message):
+        self.mirror_checkbox.blockSignals(True)
+        self.mirror_checkbox.setChecked(serving)
+        self.mirror_checkbox.blockSignals(False)
+        self.mirror_host_input.setEnabled(not serving)
+        self.mirror_port_input.setEnabled(not serving)
+        self.mirror_status.setText(message)
+
     def on_run_inference(self):
         model_id = self.model_input.text()
         input_data = self.input_text.toPlainText()
@@ -210,7 +358,45 @@ class MainWindow(QMainWindow):
         self.results_list.clear()
         sorted_results = sorted(results, key=lambda x: x['id'].lower())
         for result in sorted_results:
-            self.results_list.addItem(result['id'])
+            item = QListWidgetItem(result['id'])
+            if result.get('mirrored'):
+                font = item.font()
+                font.setBold(True)
+                item.setFont(font)
+                item.setToolTip("Available on the LAN mirror")
+            self.results_list.addItem(item)
+
+    def update_model_details(self, details):
+        lines = [
+            details["model_id"],
+            f"Revision: {details['revision'][:12]}",
+            f"Weights: {details['name']}",
+            f"Parameters: {details['parameters']:,}",
+            f"Estimated memory (weights): {format_size(details['bytes'])}",
+            "",
+            "Dtypes:",
+        ]
+        for dtype, counts in sorted(details["dtypes"].items()):
+            share = counts["parameters"] / details["parameters"] * 100 if details["parameters"] else 0
+            lines.append(f"  {dtype}: {counts['parameters']:,} params ({share:.1f}%), "
+                         f"{format_size(counts['bytes'])}")
+        if len(details["components"]) > 1:
+            lines.append("")
+            lines.append(f"Components ({len(details['components'])}):")
+            for component in details["components"]:
+                lines.append(f"  {component['name']}: {component['parameters']:,} params, "
+                             f"{format_size(component['bytes'])}")
+        lines.append("")
+        lines.append(f"Shards ({len(details['files'])}):")
+        for shard in details["files"]:
+            lines.append(f"  {shard['filename']}: {format_size(shard['bytes'])}")
+        if details["alternates"]:
+            lines.append("")
+            lines.append("Other weight sets (not included above):")
+            for group in details["alternates"]:
+                lines.append(f"  {group['name']}: {group['parameters']:,} params, "
+                             f"{format_size(group['bytes'])}")
+        self.details_text.setPlainText("\n".join(lines))
 
     def update_progress(self, value):
         self.progress_bar.setValue(value)
@@ -1,42 +1,489 @@
 import requests
 import logging
 import os
-from typing import Dict, List, Optional
+import io
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
 from urllib.parse import urljoin
+from rate_limiter import RateLimiter, RateLimitError, parse_retry_after
+from download_filter import select_files
+from manifest import load_manifest, save_manifest, diff_manifest
+from archive_stream import (ZIP_RANGE_BUFFER, ChunkReader, RangeReader, archive_type,
+                            extract_tar_stream, extract_zip, extraction_dir, local_path)
+from safetensors_header import (HEADER_PROBE_BYTES, INDEX_SUFFIX, header_length, parse_header,
+                                summarize_header, combine_summaries, group_shards)
+
+HUB_ENDPOINT = "https://huggingface.co"
+# Seconds to wait for a LAN mirror to accept a connection, and then for each read,
+# before falling back to the Hub
+MIRROR_CONNECT_TIMEOUT = 3
+MIRROR_READ_TIMEOUT = 10
+MIRROR_TIMEOUT = (MIRROR_CONNECT_TIMEOUT, MIRROR_READ_TIMEOUT)
 
 class HuggingFaceAPI:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, endpoint: str = HUB_ENDPOINT, mirror_url: str = "",
+                 limiter: Optional[RateLimiter] = None, max_retries: int = 3):
         self.api_key = api_key
-        self.base_url = "https://huggingface.co/api"
-        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.endpoint = endpoint
+        self.mirror_url = mirror_url
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+
+    @property
+    def endpoint(self) -> str:
+        return self._endpoint
+
+    @endpoint.setter
+    def endpoint(self, value: str):
+        self._endpoint = (value or HUB_ENDPOINT).rstrip("/")
+
+    @property
+    def mirror_url(self) -> str:
+        return self._mirror_url
+
+    @mirror_url.setter
+    def mirror_url(self, value: str):
+        self._mirror_url = (value or "").rstrip("/")
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.endpoint}/api"
+
+    @property
+    def headers(self) -> Dict:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def _is_mirror(self, url: str) -> bool:
+        return bool(self.mirror_url) and url.startswith(self.mirror_url + "/")
+
+    def _policy(self, url: str) -> Optional[str]:
+        """Hub rate-limit policy a URL counts against; None for other hosts such as the CDN"""
+        if not url.startswith(self.endpoint + "/"):
+            return None
+        return "resolvers" if "/resolve/" in url else "api"
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request through the shared rate limiter, retrying on 429"""
+        kwargs.setdefault("headers", self.headers)
+        if not url.startswith(self.endpoint + "/"):
+            # Never hand the Hub token to other hosts: the CDN /resolve/ redirects to, or a LAN mirror
+            kwargs["headers"] = {k: v for k, v in kwargs["headers"].items() if k != "Authorization"}
+        if self._is_mirror(url):
+            # The mirror spends no Hub quota, and its latency says nothing about the Hub's
+            return requests.request(method, url, **kwargs)
+        policy = self._policy(url)
+        for attempt in range(self.max_retries + 1):
+            if policy:
+                self.limiter.acquire(policy)
+            start = time.monotonic()
+            response = requests.request(method, url, **kwargs)
+            throttled = response.status_code == 429
+            self.limiter.record(time.monotonic() - start, throttled)
+            # Redirects from /resolve/ carry the resolver policy's headers
+            for hop in response.history + [response]:
+                self.limiter.update_from_headers(hop.headers, policy)
+            if not throttled:
+                return response
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            response.close()
+            if attempt == self.max_retries:
+                raise RateLimitError(retry_after)
+            delay = retry_after if retry_after is not None else 2 ** attempt
+            if delay > self.limiter.max_wait:
+                # Too long to wait silently; let the caller tell the user when to retry
+                if policy:
+                    self.limiter.block_for(delay, policy)
+                raise RateLimitError(delay)
+            logging.warning(f"Rate limited on {url}, retrying in {delay:.1f}s")
+            if policy:
+                self.limiter.block_for(delay, policy)
+            else:
+                time.sleep(delay)
+
+    def _mirror_request(self, path: str, **kwargs) -> Optional[requests.Response]:
+        """GET path from the LAN mirror, or None when none is set, it is unreachable or it misses"""
+        if not self.mirror_url:
+            return None
+        try:
+            response = self._request("GET", f"{self.mirror_url}{path}", timeout=MIRROR_TIMEOUT,
+                                     **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            logging.warning(f"Mirror {self.mirror_url} unavailable: {str(e)}")
+            return None
+        if not response.ok:
+            response.close()
+            return None
+        return response
+
+    def _get_first(self, urls: List[str], **kwargs):
+        """GET the first of urls that answers; all but the last are mirror URLs that may miss"""
+        for url in urls[:-1]:
+            try:
+                response = self._request("GET", url, timeout=MIRROR_TIMEOUT, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                logging.warning(f"Mirror unavailable for {url}, using the Hub: {str(e)}")
+                continue
+            if response.ok:
+                return response, url
+            logging.warning(f"Mirror returned {response.status_code} for {url}, using the Hub")
+            response.close()
+        return self._request("GET", urls[-1], **kwargs), urls[-1]
+
+    def _mirror_search(self, params: Dict) -> List[Dict]:
+        response = self._mirror_request("/api/models", params=params)
+        if response is None:
+            return []
+        try:
+            return response.json()
+        except ValueError:
+            logging.warning(f"Mirror {self.mirror_url} returned an invalid search response")
+            return []
 
     def search_models(self, query: str, filters: Optional[Dict] = None) -> List[Dict]:
+        """Search the Hub, flagging models the LAN mirror also has with "mirrored" """
         url = f"{self.base_url}/models"
         params = {"search": query}
         if filters:
             params.update(filters)
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self._request("GET", url, params=params)
             response.raise_for_status()
-            return response.json()
+            results = response.json()
         except Exception as e:
             logging.error(f"Error searching models: {str(e)}")
             raise
+        mirrored_ids = {model["id"] for model in self._mirror_search({"search": query})}
+        for result in results:
+            if result["id"] in mirrored_ids:
+                result["mirrored"] = True
+        return results
+
+    def get_model_info(self, model_id: str) -> Dict:
+        url = f"{self.base_url}/models/{model_id}"
+        try:
+            response = self._request("GET", url, params={"blobs": "true"})
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            logging.error(f"Error fetching model info: {str(e)}")
+            raise
+
+    def file_url(self, model_id: str, filename: str, revision: str = "main",
+                 endpoint: Optional[str] = None) -> str:
+        return f"{endpoint or self.endpoint}/{model_id}/resolve/{revision}/{filename}"
+
+    def _fetch_range(self, url: str, start: int, end: int) -> bytes:
+        """Fetch bytes start..end inclusive, reading no further if Range is ignored"""
+        headers = dict(self.headers, Range=f"bytes={start}-{end}")
+        response = self._request("GET", url, headers=headers, stream=True)
+        try:
+            response.raise_for_status()
+            data = bytearray()
+            if response.status_code == 200:
+                # Server sent the whole file; skip ahead to the requested window
+                for chunk in response.iter_content(chunk_size=65536):
+                    data += chunk
+                    if len(data) > end:
+                        break
+                return bytes(data[start:end + 1])
+            for chunk in response.iter_content(chunk_size=65536):
+                data += chunk
+            return bytes(data)
+        finally:
+            response.close()
 
-    def download_model(self, model_id: str, download_dir: str) -> str:
-        url = f"{self.base_url}/models/{model_id}/download"
-        response = requests.get(url, headers=self.headers, stream=True)
-        response.raise_for_status()
-        
-        filename = response.headers.get('Content-Disposition', '').split('filename=')[-1]
-        if not filename:
-            filename = f"{model_id.split('/')[-1]}.tar.gz"
-        
-        filepath = os.path.join(download_dir, filename)
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        return filepath
+    def inspect_model(self, model_id: str) -> Dict:
+        """Summarize safetensors weight sets from their headers without downloading weights.
+
+        Repos often ship the same weights more than once (an index plus
+        `consolidated.safetensors`, fp16 variants, `original/` copies), so only
+        the primary sets are summed into the top-level fields; the rest are
+        summarized separately as alternates. Diffusers pipelines have one
+        primary set per component folder.
+        """
+        info = self.get_model_info(model_id)
+        revision = info.get("sha", "main")
+        siblings = [s["rfilename"] for s in info.get("siblings", [])]
+        filenames = [name for name in siblings if name.endswith(".safetensors")]
+        if not filenames:
+            raise ValueError(f"{model_id} has no safetensors files to inspect")
+        indexes = {}
+        for name in siblings:
+            if name.endswith(INDEX_SUFFIX):
+                response = self._request("GET", self.file_url(model_id, name, revision))
+                response.raise_for_status()
+                indexes[name] = response.json()
+        primary, alternates = group_shards(filenames, indexes, "model_index.json" in siblings)
+        components = [self._inspect_weight_set(model_id, revision, name, shards)
+                      for name, shards in primary]
+        result = combine_summaries(components)
+        result.update({
+            "model_id": model_id,
+            "revision": revision,
+            "name": ", ".join(component["name"] for component in components),
+            "files": [f for component in components for f in component["files"]],
+            "components": components,
+            "alternates": [self._inspect_weight_set(model_id, revision, name, shards)
+                           for name, shards in alternates],
+        })
+        return result
+
+    def _inspect_weight_set(self, model_id: str, revision: str, name: str,
+                            shards: List[str]) -> Dict:
+        files = []
+        for filename in shards:
+            url = self.file_url(model_id, filename, revision)
+            data = self._fetch_range(url, 0, HEADER_PROBE_BYTES - 1)
+            length = header_length(data)
+            if len(data) < 8 + length:
+                data += self._fetch_range(url, len(data), 8 + length - 1)
+            summary = summarize_header(parse_header(data))
+            summary["filename"] = filename
+            files.append(summary)
+        weight_set = combine_summaries(files)
+        weight_set.update({"name": name, "files": files})
+        return weight_set
+
+    def plan_download(self, model_id: str, include: Optional[List[str]] = None,
+                      exclude: Optional[List[str]] = None,
+                      preferred_format: str = "safetensors",
+                      extract_archives: bool = False, keep_archives: bool = True) -> Dict:
+        """List the files a download would fetch, and how many bytes they add up to"""
+        info = self.get_model_info(model_id)
+        options = {"include": include or [], "exclude": exclude or [],
+                   "preferred_format": preferred_format,
+                   "extract_archives": extract_archives, "keep_archives": keep_archives}
+        plan = self._plan_from_info(model_id, info, options)
+        self._attach_mirror(plan)
+        return plan
+
+    def _file_entry(self, sibling: Dict) -> Dict:
+        lfs = sibling.get("lfs") or {}
+        return {
+            "rfilename": sibling["rfilename"],
+            "size": sibling.get("size") or lfs.get("size", 0),
+            # Matches the ETag the resolve endpoint serves for the file
+            "etag": lfs.get("sha256") or sibling.get("blobId"),
+        }
+
+    def _plan_from_info(self, model_id: str, info: Dict, options: Dict) -> Dict:
+        files = [self._file_entry(sibling) for sibling in info.get("siblings", [])]
+        selected = select_files(files, options["include"], options["exclude"],
+                                options["preferred_format"])
+        return {
+            "model_id": model_id,
+            "revision": info.get("sha", "main"),
+            # Gated and private repos are never offered to other machines by the mirror server
+            "shareable": not info.get("private") and not info.get("gated"),
+            "options": options,
+            "files": selected,
+            "total_bytes": sum(f["size"] for f in selected),
+            "skipped_files": len(files) - len(selected),
+            "skipped_bytes": sum(f["size"] for f in files) - sum(f["size"] for f in selected),
+            "mirror_revision": None,
+            "mirrored_bytes": 0,
+        }
+
+    def _attach_mirror(self, plan: Dict):
+        """Mark planned files the LAN mirror holds with the same content so they are fetched from it.
+
+        The file list and revision always come from the Hub; the mirror only
+        supplies bytes for files whose etag and size match.
+        """
+        response = self._mirror_request(f"/api/models/{plan['model_id']}")
+        if response is None:
+            return
+        try:
+            info = response.json()
+        except ValueError:
+            return
+        held = {}
+        for sibling in info.get("siblings", []):
+            entry = self._file_entry(sibling)
+            held[entry["rfilename"]] = (entry["etag"], entry["size"])
+        plan["mirror_revision"] = info.get("sha", "main")
+        for file in plan["files"]:
+            file["mirrored"] = (file["etag"] is not None
+                                and held.get(file["rfilename"]) == (file["etag"], file["size"]))
+        plan["mirrored_bytes"] = sum(f["size"] for f in plan["files"] if f["mirrored"])
+
+    def download_model(self, model_id: str, download_dir: str,
+                       include: Optional[List[str]] = None,
+                       exclude: Optional[List[str]] = None,
+                       preferred_format: str = "safetensors",
+                       extract_archives: bool = False, keep_archives: bool = True,
+                       plan: Optional[Dict] = None,
+                       progress_callback: Optional[Callable[[int], None]] = None) -> str:
+        if plan is None:
+            plan = self.plan_download(model_id, include, exclude, preferred_format,
+                                      extract_archives, keep_archives)
+        model_dir = os.path.join(download_dir, *model_id.split("/"))
+        self._fetch_files(model_dir, plan, plan["files"], progress_callback)
+        save_manifest(model_dir, plan)
+        return model_dir
+
+    def sync_model(self, model_dir: str, archive_removed: bool = False,
+                   progress_callback: Optional[Callable[[int], None]] = None) -> Dict:
+        """Bring a downloaded model up to date, fetching only added or changed files.
+
+        The revision is always checked on the Hub, never the mirror. When it
+        matches the manifest this costs a single metadata request. Files
+        dropped upstream are deleted, or moved under `.hf_archive/<old
+        revision>/` when archive_removed is set.
+        """
+        manifest = load_manifest(model_dir)
+        if manifest is None:
+            raise ValueError(f"No download manifest found in {model_dir}")
+        model_id = manifest["model_id"]
+        info = self.get_model_info(model_id)
+        result = {"model_id": model_id, "revision": info.get("sha", "main"),
+                  "updated": [], "removed": []}
+        if result["revision"] == manifest["revision"]:
+            return result
+
+        options = dict({"extract_archives": False, "keep_archives": True}, **manifest["options"])
+        plan = self._plan_from_info(model_id, info, options)
+        changed, removed = diff_manifest(manifest, plan)
+        changed += [f for f in plan["files"] if f not in changed
+                    and not self._local_paths(model_dir, f["rfilename"], options)]
+        if changed:
+            self._attach_mirror(plan)
+        self._fetch_files(model_dir, plan, changed, progress_callback)
+
+        for filename in removed:
+            for filepath in self._local_paths(model_dir, filename, options):
+                if archive_removed:
+                    archive_dir = os.path.join(model_dir, ".hf_archive", manifest["revision"][:12])
+                    target = local_path(archive_dir, os.path.relpath(filepath, model_dir))
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(filepath, target)
+                elif os.path.isdir(filepath):
+                    shutil.rmtree(filepath)
+                else:
+                    os.remove(filepath)
+
+        save_manifest(model_dir, plan)
+        result["updated"] = [f["rfilename"] for f in changed]
+        result["removed"] = removed
+        return result
+
+    def _local_paths(self, model_dir: str, filename: str, options: Dict) -> List[str]:
+        """Existing local paths for a repo file: the file itself and/or its extracted directory"""
+        filepath = local_path(model_dir, filename)
+        paths = [filepath]
+        if options.get("extract_archives") and archive_type(filename):
+            paths.append(extraction_dir(filepath))
+        return [path for path in paths if os.path.exists(path)]
+
+    def _fetch_files(self, model_dir: str, plan: Dict, files: List[Dict],
+                     progress_callback: Optional[Callable[[int], None]] = None):
+        """Download files in parallel, as many at a time as the limiter's concurrency allows"""
+        options = plan["options"]
+        total = sum(f["size"] for f in files)
+        done = 0
+        lock = threading.Lock()
+
+        def advance(count: int):
+            nonlocal done
+            with lock:
+                done += count
+                if progress_callback and total:
+                    progress_callback(min(100, int(done * 100 / total)))
+
+        def fetch(file: Dict):
+            filepath = local_path(model_dir, file["rfilename"])
+            urls = [self.file_url(plan["model_id"], file["rfilename"], plan["revision"])]
+            if file.get("mirrored"):
+                urls.insert(0, self.file_url(plan["model_id"], file["rfilename"],
+                                             plan["mirror_revision"], self.mirror_url))
+            # Holding a slot for the whole Hub transfer lets AIMD cap parallel downloads;
+            # mirror transfers use none
+            with nullcontext() if file.get("mirrored") else self.limiter.slot():
+                if options.get("extract_archives") and archive_type(file["rfilename"]):
+                    self._extract_file(urls, filepath, file["size"], options["keep_archives"],
+                                       advance)
+                else:
+                    self._download_file(urls, filepath, advance)
+
+        with ThreadPoolExecutor(max_workers=self.limiter.max_concurrency) as pool:
+            futures = [pool.submit(fetch, file) for file in files]
+            try:
+                for future in futures:
+                    future.result()
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+        if progress_callback:
+            progress_callback(100)
+
+    def _download_file(self, urls: List[str], filepath: str, on_chunk: Callable[[int], None]):
+        """Stream the first reachable of urls into filepath via a .part file"""
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        response, _ = self._get_first(urls, stream=True)
+        try:
+            response.raise_for_status()
+            with open(filepath + ".part", 'wb') as f:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    f.write(chunk)
+                    on_chunk(len(chunk))
+        finally:
+            response.close()
+        os.replace(filepath + ".part", filepath)
+
+    def _extract_file(self, urls: List[str], filepath: str, size: int, keep_archive: bool,
+                      on_chunk: Callable[[int], None]):
+        """Unpack an archive as it downloads instead of writing it out and reading it back.
+
+        Tar archives are extracted from the response stream, teeing the bytes
+        into the archive file only when it is kept. Zip needs its central
+        directory first, so without a kept copy entries are read through
+        range requests; with one, the archive is downloaded and then opened.
+        """
+        dest = extraction_dir(filepath)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        if archive_type(filepath) == "zip":
+            if keep_archive or not size:
+                self._download_file(urls, filepath, on_chunk)
+                with open(filepath, "rb") as f:
+                    extract_zip(f, dest)
+            else:
+                # Probe with a one byte range to settle on a source and follow the /resolve/
+                # redirect once; entries are then read from where it leads
+                probe, _ = self._get_first(urls, headers=dict(self.headers, Range="bytes=0-0"),
+                                           stream=True)
+                try:
+                    probe.raise_for_status()
+                finally:
+                    probe.close()
+                reader = RangeReader(lambda start, end: self._fetch_range(probe.url, start, end),
+                                     size, on_chunk)
+                extract_zip(io.BufferedReader(reader, ZIP_RANGE_BUFFER), dest)
+            return
+
+        response, _ = self._get_first(urls, stream=True)
+        try:
+            response.raise_for_status()
+            chunks = response.iter_content(chunk_size=1024 * 1024)
+            if keep_archive:
+                try:
+                    with open(filepath + ".part", "wb") as copy:
+                        reader = ChunkReader(chunks, copy, on_chunk)
+                        extract_tar_stream(reader, dest)
+                        # tarfile stops at the end-of-archive marker; keep the padding too
+                        reader.read()
+                except Exception:
+                    os.remove(filepath + ".part")
+                    raise
+                os.replace(filepath + ".part", filepath)
+            else:
+                extract_tar_stream(ChunkReader(chunks, on_read=on_chunk), dest)
+        finally:
+            response.close()
 
     def run_inference(self, model_id: str, input_text: str) -> Dict:
         """Run inference on a model"""
@@ -47,13 +494,14 @@ class HuggingFaceAPI:
                 "--inputs", input_text
             ]
             
-            result = subprocess.run(
-                cmd,
-                env=self._cli_env,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            with self.limiter.slot():
+                result = subprocess.run(
+                    cmd,
+                    env=self._cli_env,
+                    capture_output=True,
+                    text=True,
+                    check=True
+                )
             
             return {"output": result.stdout.strip()}
         except Exception as e:
@@ -4,13 +4,18 @@ from PyQt6.QtWidgets import QApplication
 from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtCore import QThread, pyqtSignal
 from gui import MainWindow
-from huggingface_api import HuggingFaceAPI
+from huggingface_api import HUB_ENDPOINT, HuggingFaceAPI
+from rate_limiter import RateLimitError
+from download_filter import parse_patterns
+from mirror_server import DEFAULT_MIRROR_HOST, DEFAULT_MIRROR_PORT, MirrorServer
 
 class WorkerThread(QThread):
     result_signal = pyqtSignal(list)
     progress_signal = pyqtSignal(int)
     message_signal = pyqtSignal(str, str)
     inference_result_signal = pyqtSignal(dict)
+    inspection_result_signal = pyqtSignal(dict)
+    plan_result_signal = pyqtSignal(dict)
 
     def __init__(self, api):
         super().__init__()
@@ -23,19 +28,61 @@ class WorkerThread(QThread):
             try:
                 results = self.api.search_models(*self.args)
                 self.result_signal.emit(results)
+            except RateLimitError as e:
+                self.message_signal.emit("Rate Limited", self.rate_limit_message(e))
             except Exception as e:
                 self.message_signal.emit(
                     "Search Error",
                     f"Failed to search models: {str(e)}"
                 )
+        elif self.task == "plan":
+            try:
+                model_id, options = self.args
+                plan = self.api.plan_download(model_id, **options)
+                self.plan_result_signal.emit(plan)
+            except RateLimitError as e:
+                self.message_signal.emit("Rate Limited", self.rate_limit_message(e))
+            except Exception as e:
+                self.message_signal.emit("Download Error", str(e))
         elif self.task == "download":
             try:
-                filepath = self.api.download_model(*self.args)
+                plan, download_dir = self.args
+                filepath = self.api.download_model(
+                    plan["model_id"], download_dir, plan=plan,
+                    progress_callback=self.progress_signal.emit)
                 self.message_signal.emit("Download Complete", 
                     f"Model downloaded to: {filepath}")
+            except RateLimitError as e:
+                self.message_signal.emit("Rate Limited", self.rate_limit_message(e))
+                self.progress_signal.emit(0)
             except Exception as e:
                 self.message_signal.emit("Download Error", str(e))
                 self.progress_signal.emit(0)
+        elif self.task == "sync":
+            try:
+                result = self.api.sync_model(
+                    *self.args, progress_callback=self.progress_signal.emit)
+                if not result["updated"] and not result["removed"]:
+                    message = f"{result['model_id']} is already up to date."
+                else:
+                    message = (f"{result['model_id']} synced to {result['revision'][:12]}: "
+                               f"{len(result['updated'])} files updated, "
+                               f"{len(result['removed'])} removed.")
+                self.message_signal.emit("Sync Complete", message)
+            except RateLimitError as e:
+                self.message_signal.emit("Rate Limited", self.rate_limit_message(e))
+                self.progress_signal.emit(0)
+            except Exception as e:
+                self.message_signal.emit("Sync Error", str(e))
+                self.progress_signal.emit(0)
+        elif self.task == "inspect":
+            try:
+                details = self.api.inspect_model(*self.args)
+                self.inspection_result_signal.emit(details)
+            except RateLimitError as e:
+                self.message_signal.emit("Rate Limited", self.rate_limit_message(e))
+            except Exception as e:
+                self.message_signal.emit("Inspection Error", str(e))
         elif self.task == "inference":
             try:
                 result = self.api.run_inference(*self.args)
@@ -43,14 +90,35 @@ class WorkerThread(QThread):
             except Exception as e:
                 self.message_signal.emit("Inference Error", str(e))
 
+    def rate_limit_message(self, error):
+        if error.retry_after:
+            return (f"The Hugging Face Hub is throttling requests. "
+                    f"Please try again in {error.retry_after:.0f} seconds.")
+        return "The Hugging Face Hub is throttling requests. Please try again shortly."
+
     def search(self, query, filters):
         self.task = "search"
         self.args = (query, filters)
         self.start()
 
-    def download(self, model_id, download_dir):
+    def plan_download(self, model_id, options):
+        self.task = "plan"
+        self.args = (model_id, options)
+        self.start()
+
+    def download(self, plan, download_dir):
         self.task = "download"
-        self.args = (model_id, download_dir)
+        self.args = (plan, download_dir)
+        self.start()
+
+    def sync(self, model_dir, archive_removed):
+        self.task = "sync"
+        self.args = (model_dir, archive_removed)
+        self.start()
+
+    def inspect(self, model_id):
+        self.task = "inspect"
+        self.args = (model_id,)
         self.start()
 
     def inference(self, model_id, inputs):
@@ -63,6 +131,16 @@ class Settings:
         self.api_key = ""
         self.default_download_dir = ""
         self.theme = "light"
+        self.include_patterns = []
+        self.exclude_patterns = []
+        self.preferred_format = "safetensors"
+        self.extract_archives = False
+        self.keep_archives = True
+        self.endpoint = HUB_ENDPOINT
+        self.mirror_url = ""
+        self.mirror_port = DEFAULT_MIRROR_PORT
+        self.serve_mirror = False
+        self.mirror_host = DEFAULT_MIRROR_HOST
         self.load_settings()
 
     def load_settings(self):
@@ -73,17 +151,43 @@ class Settings:
                     self.api_key = lines[0].strip()
                     self.default_download_dir = lines[1].strip()
                     self.theme = lines[2].strip()
+                if len(lines) >= 6:
+                    self.include_patterns = parse_patterns(lines[3])
+                    self.exclude_patterns = parse_patterns(lines[4])
+                    self.preferred_format = lines[5].strip() or "safetensors"
+                if len(lines) >= 8:
+                    self.extract_archives = lines[6].strip() == "True"
+                    self.keep_archives = lines[7].strip() != "False"
+                if len(lines) >= 11:
+                    self.endpoint = lines[8].strip() or self.endpoint
+                    self.mirror_url = lines[9].strip()
+                    self.mirror_port = int(lines[10].strip() or DEFAULT_MIRROR_PORT)
+                if len(lines) >= 12:
+                    self.serve_mirror = lines[11].strip() == "True"
+                if len(lines) >= 13:
+                    self.mirror_host = lines[12].strip() or DEFAULT_MIRROR_HOST
 
     def save_settings(self):
         with open("settings.txt", "w") as f:
-            f.write(f"{self.api_key}\n{self.default_download_dir}\n{self.theme}")
+            f.write(f"{self.api_key}\n{self.default_download_dir}\n{self.theme}\n"
+                    f"{', '.join(self.include_patterns)}\n{', '.join(self.exclude_patterns)}\n"
+                    f"{self.preferred_format}\n{self.extract_archives}\n{self.keep_archives}\n"
+                    f"{self.endpoint}\n{self.mirror_url}\n{self.mirror_port}\n{self.serve_mirror}\n"
+                    f"{self.mirror_host}")
+
+    def set_download_options(self, options):
+        self.include_patterns = options["include"]
+        self.exclude_patterns = options["exclude"]
+        self.preferred_format = options["preferred_format"]
+        self.extract_archives = options["extract_archives"]
+        self.keep_archives = options["keep_archives"]
 
 def main():
     app = QApplication(sys.argv)
     
     try:
         settings = Settings()
-        api = HuggingFaceAPI(settings.api_key)
+        api = HuggingFaceAPI(settings.api_key, settings.endpoint, settings.mirror_url)
         if not settings.api_key:
             QMessageBox.warning(None, "API Key Missing", 
                 "Please enter your Hugging Face API key in the Settings tab.")
@@ -97,29 +201,78 @@ def main():
     
     window = MainWindow()
     worker = WorkerThread(api)
+    mirror = None
+
+    def toggle_mirror(enabled, host, port):
+        nonlocal mirror
+        settings.serve_mirror = enabled
+        settings.mirror_host = host
+        settings.mirror_port = port
+        if mirror:
+            mirror.stop()
+            mirror = None
+        if not enabled:
+            window.set_mirror_status(False, "Not serving")
+            return
+        if not settings.default_download_dir:
+            settings.serve_mirror = False
+            window.set_mirror_status(False, "Not serving")
+            window.show_message("Mirror Error", "Set a default download directory to serve models from.")
+            return
+        try:
+            mirror = MirrorServer(settings.default_download_dir, port, host)
+            mirror.start()
+            window.set_mirror_status(True, f"Serving {settings.default_download_dir} on {host}:{mirror.port}")
+        except OSError as e:
+            mirror = None
+            settings.serve_mirror = False
+            window.set_mirror_status(False, "Not serving")
+            window.show_message("Mirror Error", f"Failed to start mirror on {host}:{port}: {str(e)}")
 
     # Connect signals
     window.theme_signal.connect(lambda theme: setattr(settings, 'theme', theme))
     window.search_signal.connect(worker.search)
+    window.plan_signal.connect(worker.plan_download)
+    window.plan_signal.connect(lambda model_id, options: settings.set_download_options(options))
     window.download_signal.connect(worker.download)
+    window.sync_signal.connect(worker.sync)
     window.inference_signal.connect(worker.inference)
+    window.inspect_signal.connect(worker.inspect)
     worker.result_signal.connect(window.update_results)
     worker.progress_signal.connect(window.update_progress)
     worker.message_signal.connect(window.show_message)
     worker.inference_result_signal.connect(window.update_inference_output)
+    worker.inspection_result_signal.connect(window.update_model_details)
+    worker.plan_result_signal.connect(window.confirm_download)
 
     # Connect settings signals
     window.api_key_signal.connect(lambda key: setattr(settings, 'api_key', key))
     window.api_key_signal.connect(lambda key: setattr(api, 'api_key', key))
     window.default_dir_signal.connect(lambda dir: setattr(settings, 'default_download_dir', dir))
+    window.endpoint_signal.connect(lambda endpoint, mirror_url: setattr(settings, 'endpoint', endpoint or HUB_ENDPOINT))
+    window.endpoint_signal.connect(lambda endpoint, mirror_url: setattr(settings, 'mirror_url', mirror_url))
+    window.endpoint_signal.connect(lambda endpoint, mirror_url: setattr(api, 'endpoint', endpoint))
+    window.endpoint_signal.connect(lambda endpoint, mirror_url: setattr(api, 'mirror_url', mirror_url))
+    window.mirror_signal.connect(toggle_mirror)
 
     # Load initial settings
     window.api_key_input.setText(settings.api_key)
     window.download_dir_input.setText(settings.default_download_dir)
     window.theme_selector.setCurrentIndex(1 if settings.theme == "dark" else 0)
+    window.include_input.setText(", ".join(settings.include_patterns))
+    window.exclude_input.setText(", ".join(settings.exclude_patterns))
+    window.format_selector.setCurrentText(settings.preferred_format)
+    window.extract_checkbox.setChecked(settings.extract_archives)
+    window.keep_archive_checkbox.setChecked(settings.keep_archives)
+    window.endpoint_input.setText(settings.endpoint)
+    window.mirror_url_input.setText(settings.mirror_url)
+    window.mirror_host_input.setText(settings.mirror_host)
+    window.mirror_port_input.setValue(settings.mirror_port)
+    window.mirror_checkbox.setChecked(settings.serve_mirror)
 
     # Save settings on close
     app.aboutToQuit.connect(settings.save_settings)
+    app.aboutToQuit.connect(lambda: mirror and mirror.stop())
 
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,45 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+MANIFEST_NAME = ".hf_manifest.json"
+
+
+def manifest_path(model_dir: str) -> str:
+    return os.path.join(model_dir, MANIFEST_NAME)
+
+
+def load_manifest(model_dir: str) -> Optional[Dict]:
+    path = manifest_path(model_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(model_dir: str, plan: Dict):
+    """Record the revision, download options and per-file etag/size of a download"""
+    manifest = {
+        "model_id": plan["model_id"],
+        "revision": plan["revision"],
+        "shareable": plan.get("shareable", False),
+        "options": plan["options"],
+        "files": {f["rfilename"]: {"etag": f.get("etag"), "size": f["size"]}
+                  for f in plan["files"]},
+    }
+    path = manifest_path(model_dir)
+    with open(path + ".part", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".part", path)
+
+
+def diff_manifest(manifest: Dict, plan: Dict) -> Tuple[List[Dict], List[str]]:
+    """Return files in plan that are new or changed, and filenames no longer present"""
+    old = manifest["files"]
+    changed = [f for f in plan["files"]
+               if f["rfilename"] not in old
+               or old[f["rfilename"]]["etag"] != f.get("etag")
+               or old[f["rfilename"]]["size"] != f["size"]]
+    current = {f["rfilename"] for f in plan["files"]}
+    removed = [name for name in old if name not in current]
+    return changed, removed
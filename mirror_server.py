@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+from archive_stream import local_path
+from manifest import MANIFEST_NAME, load_manifest
+
+DEFAULT_MIRROR_HOST = "0.0.0.0"
+DEFAULT_MIRROR_PORT = 8088
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into inclusive (start, end); None means the whole file.
+
+    Raises ValueError for ranges that cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    if not start:
+        length = int(end)
+        if length <= 0:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class ModelStore:
+    """Read-only view of downloaded models, located through their manifests.
+
+    Only models whose manifest marks them shareable are exposed; gated and
+    private repos, and manifests that predate the flag, stay hidden.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def model_dir(self, model_id: str) -> str:
+        return local_path(self.root, model_id)
+
+    def manifest(self, model_id: str) -> Optional[Dict]:
+        try:
+            manifest = load_manifest(self.model_dir(model_id))
+        except ValueError:
+            return None
+        if manifest is None or manifest["model_id"] != model_id or not manifest.get("shareable"):
+            return None
+        return manifest
+
+    def model_ids(self) -> List[str]:
+        ids = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            if MANIFEST_NAME in filenames:
+                model_id = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+                if self.manifest(model_id):
+                    ids.append(model_id)
+                dirnames[:] = []
+        return sorted(ids)
+
+    def files(self, model_id: str, manifest: Dict) -> List[Dict]:
+        """Manifest entries that are actually on disk, e.g. not unkept extracted archives"""
+        model_dir = self.model_dir(model_id)
+        return [dict(entry, rfilename=name) for name, entry in sorted(manifest["files"].items())
+                if os.path.isfile(local_path(model_dir, name))]
+
+
+class MirrorRequestHandler(BaseHTTPRequestHandler):
+    """Serves the Hub routes the client uses: model search and info, tree and resolve"""
+
+    protocol_version = "HTTP/1.1"
+    store = None
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def log_message(self, format, *args):
+        logging.info(f"Mirror {self.address_string()}: {format % args}")
+
+    def handle_request(self, send_body: bool):
+        parsed = urlparse(self.path)
+        path = unquote(parsed.path)
+        try:
+            if path == "/api/models":
+                query = parse_qs(parsed.query).get("search", [""])[0].lower()
+                models = [{"id": model_id, "modelId": model_id}
+                          for model_id in self.store.model_ids() if query in model_id.lower()]
+                self.send_json(models, send_body)
+            elif path.startswith("/api/models/"):
+                self.serve_model_api(path[len("/api/models/"):], send_body)
+            elif "/resolve/" in path:
+                model_id, _, rest = path.strip("/").partition("/resolve/")
+                revision, _, filename = rest.partition("/")
+                self.serve_file(model_id, revision, filename, send_body)
+            else:
+                self.send_error(404)
+        except ValueError:
+            self.send_error(404)
+
+    def serve_model_api(self, rest: str, send_body: bool):
+        model_id, _, tree = rest.partition("/tree/")
+        manifest = self.store.manifest(model_id.strip("/"))
+        if manifest is None:
+            self.send_error(404, "Model not mirrored")
+            return
+        model_id = manifest["model_id"]
+        files = self.store.files(model_id, manifest)
+        if tree:
+            revision, _, prefix = tree.partition("/")
+            if revision not in ("main", manifest["revision"]):
+                self.send_error(404, "Revision not mirrored")
+                return
+            entries = []
+            for entry in files:
+                if prefix and not entry["rfilename"].startswith(prefix.rstrip("/") + "/"):
+                    continue
+                item = {"type": "file", "path": entry["rfilename"], "size": entry["size"],
+                        "oid": entry["etag"]}
+                if entry["etag"] and SHA256_PATTERN.match(entry["etag"]):
+                    item["lfs"] = {"oid": entry["etag"], "size": entry["size"]}
+                entries.append(item)
+            self.send_json(entries, send_body)
+            return
+        siblings = []
+        for entry in files:
+            sibling = {"rfilename": entry["rfilename"], "size": entry["size"]}
+            if entry["etag"] and SHA256_PATTERN.match(entry["etag"]):
+                sibling["lfs"] = {"sha256": entry["etag"], "size": entry["size"]}
+            else:
+                sibling["blobId"] = entry["etag"]
+            siblings.append(sibling)
+        self.send_json({"id": model_id, "modelId": model_id, "sha": manifest["revision"],
+                        "siblings": siblings}, send_body)
+
+    def serve_file(self, model_id: str, revision: str, filename: str, send_body: bool):
+        manifest = self.store.manifest(model_id)
+        if (manifest is None or revision not in ("main", manifest["revision"])
+                or filename not in manifest["files"]):
+            self.send_error(404, "File not mirrored")
+            return
+        filepath = local_path(self.store.model_dir(model_id), filename)
+        if not os.path.isfile(filepath):
+            self.send_error(404, "File not mirrored")
+            return
+        size = os.path.getsize(filepath)
+        try:
+            byte_range = parse_range(self.headers.get("Range"), size)
+        except ValueError:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        start, end = byte_range or (0, size - 1)
+        self.send_response(206 if byte_range else 200)
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{manifest["files"][filename]["etag"]}"')
+        self.send_header("X-Repo-Commit", manifest["revision"])
+        self.end_headers()
+        if send_body and end >= start:
+            self.wfile.flush()
+            with open(filepath, "rb") as f:
+                self.connection.sendfile(f, start, end - start + 1)
+
+    def send_json(self, data, send_body: bool):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+
+class MirrorServer:
+    """Background HTTP server exposing a download directory to other instances on the LAN"""
+
+    def __init__(self, root: str, port: int = DEFAULT_MIRROR_PORT, host: str = DEFAULT_MIRROR_HOST):
+        handler = type("BoundMirrorRequestHandler", (MirrorRequestHandler,),
+                       {"store": ModelStore(root)})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def port(self) -> int:
+        return self.httpd.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
@@ -0,0 +1,212 @@
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+# Longest a caller is left waiting on the limiter; longer server waits raise instead
+MAX_WAIT = 30.0
+# Bucket for requests whose policy is not known, named like the Hub's API policy
+DEFAULT_POLICY = "api"
+
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after: Optional[float] = None):
+        self.retry_after = retry_after
+        if retry_after:
+            message = f"Rate limit exceeded, retry in {retry_after:.0f}s"
+        else:
+            message = "Rate limit exceeded"
+        super().__init__(message)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either as seconds or as an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_items(value: str) -> List[Tuple[Optional[str], Dict[str, str]]]:
+    """Split a RateLimit/RateLimit-Policy header into (policy name, parameters) items"""
+    items = []
+    for item in value.split(","):
+        name = None
+        params = {}
+        for part in item.split(";"):
+            if "=" in part:
+                key, _, val = part.partition("=")
+                params[key.strip().lower()] = val.strip().strip('"')
+            elif part.strip():
+                # `"fixed window";"api"` names the policy last
+                name = part.strip().strip('"')
+        if params:
+            items.append((name, params))
+    return items
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def parse_rate_limit_headers(headers, default_policy: Optional[str] = None
+                             ) -> Dict[Optional[str], Dict[str, float]]:
+    """Extract remaining/reset/limit/window per policy from the RateLimit header family.
+
+    Understands the combined `RateLimit: "api";r=0;t=55` form sent by the Hub
+    and `RateLimit-Policy: "fixed window";"api";q=500;w=300` for quota and
+    window, keyed by the policy they name. The separate
+    `RateLimit-Remaining`/`RateLimit-Reset` headers and their `X-RateLimit-*`
+    predecessors carry no policy name and are filed under `default_policy`.
+    """
+    policies = {}
+    for name, params in _parse_items(headers.get("RateLimit") or ""):
+        info = policies.setdefault(name or default_policy, {})
+        for key, field in (("r", "remaining"), ("t", "reset"), ("q", "limit")):
+            value = _to_float(params.get(key))
+            if value is not None:
+                info[field] = value
+    for prefix in ("RateLimit-", "X-RateLimit-"):
+        for field in ("remaining", "reset", "limit"):
+            value = _to_float(headers.get(prefix + field.capitalize()))
+            if value is not None:
+                policies.setdefault(default_policy, {}).setdefault(field, value)
+    for name, params in _parse_items(headers.get("RateLimit-Policy") or ""):
+        info = policies.setdefault(name or default_policy, {})
+        for key, field in (("q", "limit"), ("w", "window")):
+            value = _to_float(params.get(key))
+            if value is not None:
+                info.setdefault(field, value)
+    for info in policies.values():
+        # Epoch timestamps show up in some X-RateLimit-Reset implementations
+        if info.get("reset", 0) > 10 ** 9:
+            info["reset"] = max(0.0, info["reset"] - time.time())
+    return policies
+
+
+class TokenBucket:
+    """Refill state for one rate-limit policy"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+
+class RateLimiter:
+    """Per-policy token buckets plus an AIMD concurrency limit shared by every Hub call.
+
+    The Hub meters its API and file resolvers under separate policies
+    (`"api"`, `"resolvers"`, ...), so each request takes a token from the
+    bucket of its own policy; server headers adjust the refill rate of, and
+    can pause, only the bucket they name. A pause longer than `max_wait`
+    raises RateLimitError rather than blocking the caller.
+
+    Transfers that run in parallel hold a concurrency slot for their whole
+    duration. Fast responses grow the limit additively; a 429 or a response
+    slower than `latency_target` halves it.
+    """
+
+    def __init__(self, rate: float = 5.0, burst: int = 10, min_concurrency: int = 1,
+                 max_concurrency: int = 8, latency_target: float = 2.0,
+                 max_wait: float = MAX_WAIT):
+        self.rate = rate
+        self.burst = burst
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self.max_wait = max_wait
+        self.concurrency = float(min_concurrency)
+        self._buckets = {}
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    @property
+    def concurrency_limit(self) -> int:
+        return max(self.min_concurrency, int(self.concurrency))
+
+    def bucket(self, policy: str) -> TokenBucket:
+        with self._cond:
+            if policy not in self._buckets:
+                self._buckets[policy] = TokenBucket(self.rate, self.burst)
+            return self._buckets[policy]
+
+    def acquire(self, policy: str = DEFAULT_POLICY):
+        """Take one token from the bucket of `policy`, waiting for a refill if needed"""
+        bucket = self.bucket(policy)
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                bucket.refill(now)
+                if now < bucket.blocked_until:
+                    wait = bucket.blocked_until - now
+                    if wait > self.max_wait:
+                        raise RateLimitError(wait)
+                elif bucket.tokens < 1:
+                    wait = (1 - bucket.tokens) / bucket.rate
+                else:
+                    bucket.tokens -= 1
+                    return
+                self._cond.wait(wait)
+
+    def record(self, latency: Optional[float] = None, throttled: bool = False):
+        """Feed a response back into the AIMD concurrency limit"""
+        with self._cond:
+            if throttled or (latency is not None and latency > self.latency_target):
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+            else:
+                self.concurrency = min(self.max_concurrency,
+                                       self.concurrency + 1 / self.concurrency_limit)
+            self._cond.notify_all()
+
+    def block_for(self, seconds: float, policy: str = DEFAULT_POLICY):
+        """Stop handing out tokens for `policy` for `seconds`, e.g. after a Retry-After"""
+        bucket = self.bucket(policy)
+        with self._cond:
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + seconds)
+            bucket.tokens = 0.0
+            self._cond.notify_all()
+
+    def update_from_headers(self, headers, policy: Optional[str] = None):
+        """Apply RateLimit headers to the buckets they name; unnamed ones count against `policy`"""
+        for name, info in parse_rate_limit_headers(headers, policy).items():
+            if name is None:
+                continue
+            if info.get("limit") and info.get("window"):
+                bucket = self.bucket(name)
+                with self._cond:
+                    bucket.rate = info["limit"] / info["window"]
+                    bucket.burst = max(1, min(bucket.burst, int(info["limit"])))
+            if info.get("remaining") == 0 and info.get("reset"):
+                self.block_for(info["reset"], name)
+
+    @contextmanager
+    def slot(self):
+        """Hold one concurrency slot, e.g. for the whole of a file transfer"""
+        with self._cond:
+            while self._in_flight >= self.concurrency_limit:
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
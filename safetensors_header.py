@@ -0,0 +1,122 @@
+import json
+import re
+import struct
+from typing import Dict, List, Tuple
+
+# Initial range request size; most shard headers fit, larger ones need a second request
+HEADER_PROBE_BYTES = 64 * 1024
+MAX_HEADER_BYTES = 100 * 1024 * 1024
+INDEX_SUFFIX = ".safetensors.index.json"
+SHARD_PATTERN = re.compile(r"-\d+-of-\d+$")
+
+
+def header_length(prefix: bytes) -> int:
+    """Read the little-endian u64 header size that starts every safetensors file"""
+    if len(prefix) < 8:
+        raise ValueError("Not a safetensors file: missing header length")
+    (length,) = struct.unpack("<Q", prefix[:8])
+    if length > MAX_HEADER_BYTES:
+        raise ValueError(f"Safetensors header too large: {length} bytes")
+    return length
+
+
+def parse_header(data: bytes) -> Dict:
+    """Decode the JSON header that follows the 8 byte length prefix"""
+    length = header_length(data)
+    if len(data) < 8 + length:
+        raise ValueError("Incomplete safetensors header")
+    return json.loads(data[8:8 + length].decode("utf-8"))
+
+
+def summarize_header(header: Dict) -> Dict:
+    parameters = 0
+    size = 0
+    dtypes = {}
+    for name, tensor in header.items():
+        if name == "__metadata__":
+            continue
+        count = 1
+        for dim in tensor["shape"]:
+            count *= dim
+        start, end = tensor["data_offsets"]
+        parameters += count
+        size += end - start
+        dtype = dtypes.setdefault(tensor["dtype"], {"parameters": 0, "bytes": 0})
+        dtype["parameters"] += count
+        dtype["bytes"] += end - start
+    return {"parameters": parameters, "bytes": size, "dtypes": dtypes}
+
+
+def combine_summaries(files: List[Dict]) -> Dict:
+    total = {"parameters": 0, "bytes": 0, "dtypes": {}}
+    for summary in files:
+        total["parameters"] += summary["parameters"]
+        total["bytes"] += summary["bytes"]
+        for dtype, counts in summary["dtypes"].items():
+            entry = total["dtypes"].setdefault(dtype, {"parameters": 0, "bytes": 0})
+            entry["parameters"] += counts["parameters"]
+            entry["bytes"] += counts["bytes"]
+    return total
+
+
+def _split_weight_name(filename: str) -> Tuple[str, str, str]:
+    """Split into (directory, stem without shard numbering, variant such as fp16)"""
+    directory, _, base = filename.rpartition("/")
+    stem = base[:-len(".safetensors")]
+    variant = ""
+    if "." in stem:
+        stem, variant = stem.rsplit(".", 1)
+    return directory, SHARD_PATTERN.sub("", stem), variant
+
+
+def group_shards(filenames: List[str], indexes: Dict[str, Dict], pipeline: bool = False
+                 ) -> Tuple[List[Tuple[str, List[str]]], List[Tuple[str, List[str]]]]:
+    """Split safetensors files into weight sets and pick the ones that make up the model.
+
+    Shards listed in an index's weight_map form one set named after the
+    index. The rest are grouped by directory, shard stem and variant, so
+    `consolidated.safetensors`, `*.fp16.safetensors` and `original/` copies
+    each get their own set.
+
+    Returns (primary, alternates). The primary sets are summed. Usually that
+    is one set: top-level, index-backed and variant-free sets win. In a
+    diffusers-style pipeline (`model_index.json` present) each component
+    folder (`unet/`, `vae/`, `text_encoder/`, ...) holds different weights,
+    so the best set of every component counts, while top-level single-file
+    checkpoints duplicate them and become alternates.
+    """
+    remaining = set(filenames)
+    groups = []
+    for index_name, index in indexes.items():
+        directory = index_name.rpartition("/")[0]
+        prefix = directory + "/" if directory else ""
+        shards = sorted({prefix + shard for shard in index.get("weight_map", {}).values()}
+                        & remaining)
+        if shards:
+            remaining -= set(shards)
+            variant = _split_weight_name(index_name[:-len(".index.json")])[2]
+            groups.append(((directory.count("/") + bool(directory), 0, bool(variant), index_name),
+                           directory, index_name, shards))
+    by_key = {}
+    for filename in sorted(remaining):
+        directory, stem, variant = _split_weight_name(filename)
+        by_key.setdefault((directory, stem, variant), []).append(filename)
+    for (directory, stem, variant), shards in by_key.items():
+        name = (directory + "/" if directory else "") + stem + ("." + variant if variant else "")
+        groups.append(((directory.count("/") + bool(directory), 1, bool(variant), name),
+                       directory, name, shards))
+    # A pipeline without component weights is judged like any other repo
+    pipeline = pipeline and any(directory for _, directory, _, _ in groups)
+    primary, alternates, components = [], [], set()
+    for _, directory, name, shards in sorted(groups):
+        component = directory.partition("/")[0]
+        if pipeline:
+            taken = not component or component in components
+        else:
+            taken = bool(primary)
+        if taken:
+            alternates.append((name, shards))
+        else:
+            components.add(component)
+            primary.append((name, shards))
+    return primary, alternates
@@ -0,0 +1,97 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from archive_stream import (ChunkReader, RangeReader, archive_type, extract_tar_stream,
+                            extract_zip, local_path)
+
+
+def test_local_path_joins_nested_filenames(tmp_path):
+    root = str(tmp_path)
+    assert local_path(root, "unet/config.json") == os.path.join(root, "unet", "config.json")
+    assert local_path(root, "a/../b.txt") == os.path.join(root, "b.txt")
+
+
+@pytest.mark.parametrize("filename", ["../escape.txt", "a/../../escape.txt", "/etc/passwd"])
+def test_local_path_refuses_escaping_filenames(tmp_path, filename):
+    with pytest.raises(ValueError):
+        local_path(str(tmp_path), filename)
+
+
+def test_local_path_refuses_sibling_with_common_prefix(tmp_path):
+    root = str(tmp_path / "model")
+    with pytest.raises(ValueError):
+        local_path(root, "../model-evil/file")
+
+
+def test_archive_type():
+    assert archive_type("data/images.TAR.GZ") == "tar"
+    assert archive_type("data.zip") == "zip"
+    assert archive_type("model.safetensors") is None
+
+
+def make_tar(members):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        link = tarfile.TarInfo("link")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "/etc/passwd"
+        tar.addfile(link)
+    return buf.getvalue()
+
+
+def test_extract_tar_stream_skips_escaping_members_and_links(tmp_path):
+    data = make_tar([("a/b.txt", b"hello"), ("../evil.txt", b"x")])
+    chunks = [data[i:i + 100] for i in range(0, len(data), 100)]
+    dest = str(tmp_path / "out")
+    extract_tar_stream(ChunkReader(chunks), dest)
+    with open(os.path.join(dest, "a", "b.txt"), "rb") as f:
+        assert f.read() == b"hello"
+    assert not os.path.exists(tmp_path / "evil.txt")
+    assert not os.path.lexists(os.path.join(dest, "link"))
+
+
+def test_failed_extraction_keeps_previous_contents(tmp_path):
+    dest = str(tmp_path / "out")
+    os.makedirs(dest)
+    (tmp_path / "out" / "old.txt").write_text("old")
+    with pytest.raises(tarfile.TarError):
+        extract_tar_stream(ChunkReader([b"not a tar archive" * 100]), dest)
+    assert os.listdir(dest) == ["old.txt"]
+    assert not os.path.exists(dest + ".part")
+
+
+def test_extract_zip_through_range_reader(tmp_path):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        archive.writestr("x/y.txt", "zipped")
+        archive.writestr("../evil.txt", "x")
+    data = buf.getvalue()
+    reads = []
+
+    def fetch_range(start, end):
+        reads.append((start, end))
+        return data[start:end + 1]
+
+    dest = str(tmp_path / "out")
+    extract_zip(io.BufferedReader(RangeReader(fetch_range, len(data)), 64), dest)
+    with open(os.path.join(dest, "x", "y.txt")) as f:
+        assert f.read() == "zipped"
+    assert not os.path.exists(tmp_path / "evil.txt")
+    assert all(0 <= start <= end < len(data) for start, end in reads)
+
+
+def test_chunk_reader_copies_what_it_reads():
+    copy = io.BytesIO()
+    counted = []
+    reader = ChunkReader([b"ab", b"", b"cde"], copy, counted.append)
+    assert reader.read() == b"abcde"
+    assert copy.getvalue() == b"abcde"
+    assert sum(counted) == 5
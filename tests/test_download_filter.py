@@ -0,0 +1,58 @@
+from download_filter import matches, parse_patterns, select_files, weight_format
+
+
+def names(files):
+    return sorted(f["rfilename"] for f in files)
+
+
+def repo(*filenames):
+    return [{"rfilename": name, "size": 1} for name in filenames]
+
+
+def test_parse_patterns_and_matches():
+    patterns = parse_patterns(" *.json, ,tokenizer* ")
+    assert patterns == ["*.json", "tokenizer*"]
+    assert matches("sub/config.json", patterns)
+    assert matches("sub/tokenizer.model", patterns)
+    assert not matches("model.safetensors", patterns)
+
+
+def test_weight_format():
+    assert weight_format("model-00001-of-00002.safetensors") == "safetensors"
+    assert weight_format("pytorch_model.bin") == "pytorch"
+    assert weight_format("openvino_model.bin") == "openvino"
+    assert weight_format("training_args.bin") is None
+    assert weight_format("config.json") is None
+
+
+def test_preferred_format_drops_duplicate_weights_and_subfolder_copies():
+    files = repo("config.json", "model.safetensors", "pytorch_model.bin", "tf_model.h5",
+                 "onnx/model.onnx", "training_args.bin")
+    assert names(select_files(files)) == ["config.json", "model.safetensors",
+                                          "training_args.bin"]
+
+
+def test_falls_back_when_preferred_format_is_missing():
+    files = repo("config.json", "pytorch_model.bin", "tf_model.h5")
+    assert names(select_files(files)) == ["config.json", "pytorch_model.bin"]
+    assert names(select_files(files, preferred_format="tensorflow")) == ["config.json",
+                                                                         "tf_model.h5"]
+
+
+def test_pipeline_components_choose_their_own_format():
+    files = repo("model_index.json",
+                 "unet/diffusion_pytorch_model.bin",
+                 "text_encoder/model.safetensors", "text_encoder/pytorch_model.bin",
+                 "vae/diffusion_pytorch_model.safetensors")
+    assert names(select_files(files)) == ["model_index.json",
+                                          "text_encoder/model.safetensors",
+                                          "unet/diffusion_pytorch_model.bin",
+                                          "vae/diffusion_pytorch_model.safetensors"]
+
+
+def test_include_exclude_and_all():
+    files = repo("config.json", "model.safetensors", "pytorch_model.bin", "README.md")
+    assert names(select_files(files, include=["*.json", "*.safetensors"])) == [
+        "config.json", "model.safetensors"]
+    assert names(select_files(files, exclude=["*.md"], preferred_format="all")) == [
+        "config.json", "model.safetensors", "pytorch_model.bin"]
@@ -0,0 +1,29 @@
+import socket
+
+import pytest
+
+pytest.importorskip("requests")
+
+from huggingface_api import HuggingFaceAPI
+
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_policy_follows_url_kind():
+    api = HuggingFaceAPI("token")
+    assert api._policy("https://huggingface.co/api/models") == "api"
+    assert api._policy("https://huggingface.co/org/model/resolve/main/model.safetensors") == "resolvers"
+    assert api._policy("https://cdn-lfs.hf.co/repos/blob") is None
+
+
+def test_dead_mirror_leaves_the_hub_limiter_alone():
+    api = HuggingFaceAPI("token", mirror_url=f"http://127.0.0.1:{unused_port()}")
+    concurrency = api.limiter.concurrency
+    assert api._mirror_request("/api/models") is None
+    assert api._mirror_search({"search": "bert"}) == []
+    assert api.limiter.concurrency == concurrency
+    assert api.limiter._buckets == {}
@@ -0,0 +1,27 @@
+from manifest import diff_manifest, load_manifest, save_manifest
+
+
+def make_plan(files):
+    return {"model_id": "org/model", "revision": "abc", "options": {},
+            "files": [{"rfilename": name, "etag": etag, "size": size}
+                      for name, etag, size in files]}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    save_manifest(str(tmp_path), make_plan([("config.json", "e1", 10)]))
+    manifest = load_manifest(str(tmp_path))
+    assert manifest["files"] == {"config.json": {"etag": "e1", "size": 10}}
+    assert manifest["shareable"] is False
+
+
+def test_load_manifest_missing(tmp_path):
+    assert load_manifest(str(tmp_path)) is None
+
+
+def test_diff_manifest_reports_changed_new_and_removed(tmp_path):
+    save_manifest(str(tmp_path), make_plan([("a", "e1", 1), ("b", "e2", 2), ("c", "e3", 3)]))
+    manifest = load_manifest(str(tmp_path))
+    changed, removed = diff_manifest(manifest, make_plan([("a", "e1", 1), ("b", "e9", 2),
+                                                          ("d", "e4", 4)]))
+    assert [f["rfilename"] for f in changed] == ["b", "d"]
+    assert removed == ["c"]
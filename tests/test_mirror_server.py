@@ -0,0 +1,86 @@
+import json
+import os
+import urllib.error
+import urllib.request
+
+import pytest
+
+from manifest import save_manifest
+from mirror_server import MirrorServer, ModelStore, parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-0", (0, 0)),
+    ("bytes=10-", (10, 99)),
+    ("bytes=90-200", (90, 99)),
+    ("bytes=-10", (90, 99)),
+    ("bytes=-500", (0, 99)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=5-2", "bytes=-0", "bytes=a-b", "bytes=-"])
+def test_parse_range_rejects_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
+
+
+def write_model(root, model_id, shareable, files):
+    model_dir = os.path.join(root, *model_id.split("/"))
+    os.makedirs(model_dir)
+    for name, data in files.items():
+        with open(os.path.join(model_dir, name), "wb") as f:
+            f.write(data)
+    save_manifest(model_dir, {
+        "model_id": model_id, "revision": "abc123", "shareable": shareable, "options": {},
+        "files": [{"rfilename": name, "etag": "e-" + name, "size": len(data)}
+                  for name, data in files.items()]})
+
+
+def test_model_store_hides_unshareable_models(tmp_path):
+    write_model(str(tmp_path), "org/public", True, {"config.json": b"{}"})
+    write_model(str(tmp_path), "org/gated", False, {"config.json": b"{}"})
+    store = ModelStore(str(tmp_path))
+    assert store.model_ids() == ["org/public"]
+    assert store.manifest("org/gated") is None
+
+
+def test_model_store_refuses_escaping_model_ids(tmp_path):
+    store = ModelStore(str(tmp_path / "root"))
+    with pytest.raises(ValueError):
+        store.model_dir("../outside")
+
+
+@pytest.fixture
+def server(tmp_path):
+    write_model(str(tmp_path), "org/public", True, {"weights.bin": bytes(range(100))})
+    mirror = MirrorServer(str(tmp_path), port=0, host="127.0.0.1")
+    mirror.start()
+    yield f"http://127.0.0.1:{mirror.port}"
+    mirror.stop()
+
+
+def test_server_serves_ranges_and_model_info(server):
+    request = urllib.request.Request(f"{server}/org/public/resolve/main/weights.bin",
+                                     headers={"Range": "bytes=10-19"})
+    with urllib.request.urlopen(request) as response:
+        assert response.status == 206
+        assert response.headers["Content-Range"] == "bytes 10-19/100"
+        assert response.read() == bytes(range(10, 20))
+    with urllib.request.urlopen(f"{server}/api/models/org/public") as response:
+        info = json.load(response)
+    assert info["sha"] == "abc123"
+    assert [s["rfilename"] for s in info["siblings"]] == ["weights.bin"]
+
+
+def test_server_rejects_traversal_and_unknown_files(server):
+    for path in ["/org/public/resolve/main/../../../etc/passwd",
+                 "/org/public/resolve/main/missing.bin",
+                 "/org/public/resolve/other-revision/weights.bin"]:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(server + path)
+        assert error.value.code == 404
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from rate_limiter import RateLimiter, RateLimitError, parse_rate_limit_headers, parse_retry_after
+
+
+def test_parse_retry_after_seconds_and_garbage():
+    assert parse_retry_after("12") == 12.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_parse_rate_limit_headers_keys_by_policy_name():
+    policies = parse_rate_limit_headers({
+        "RateLimit": '"resolvers";r=0;t=55',
+        "RateLimit-Policy": '"fixed window";"resolvers";q=3000;w=300',
+    })
+    assert policies == {"resolvers": {"remaining": 0.0, "reset": 55.0,
+                                      "limit": 3000.0, "window": 300.0}}
+
+
+def test_parse_rate_limit_headers_files_unnamed_headers_under_default():
+    policies = parse_rate_limit_headers({"X-RateLimit-Remaining": "4",
+                                         "X-RateLimit-Reset": "10"}, "api")
+    assert policies == {"api": {"remaining": 4.0, "reset": 10.0}}
+
+
+def test_exhausted_policy_does_not_block_the_other():
+    limiter = RateLimiter(max_wait=1.0)
+    limiter.update_from_headers({"RateLimit": '"resolvers";r=0;t=60'})
+    with pytest.raises(RateLimitError):
+        limiter.acquire("resolvers")
+    start = time.monotonic()
+    limiter.acquire("api")
+    assert time.monotonic() - start < 0.5
+
+
+def test_policy_header_sets_rate_of_named_bucket_only():
+    limiter = RateLimiter(rate=5.0)
+    limiter.update_from_headers({"RateLimit-Policy": '"fixed window";"api";q=500;w=300'})
+    assert limiter.bucket("api").rate == pytest.approx(500 / 300)
+    assert limiter.bucket("resolvers").rate == 5.0
+
+
+def test_concurrency_halves_on_throttle_and_grows_on_fast_responses():
+    limiter = RateLimiter(min_concurrency=1, max_concurrency=8)
+    for _ in range(20):
+        limiter.record(latency=0.1)
+    grown = limiter.concurrency_limit
+    assert grown > 1
+    limiter.record(throttled=True)
+    assert limiter.concurrency_limit < grown
@@ -0,0 +1,71 @@
+import json
+import struct
+
+import pytest
+
+from safetensors_header import combine_summaries, group_shards, parse_header, summarize_header
+
+
+def encode_header(header):
+    body = json.dumps(header).encode("utf-8")
+    return struct.pack("<Q", len(body)) + body
+
+
+def test_summarize_header_counts_parameters_per_dtype():
+    header = parse_header(encode_header({
+        "__metadata__": {"format": "pt"},
+        "a": {"dtype": "F16", "shape": [2, 3], "data_offsets": [0, 12]},
+        "b": {"dtype": "F32", "shape": [4], "data_offsets": [12, 28]},
+    }))
+    summary = summarize_header(header)
+    assert summary["parameters"] == 10
+    assert summary["bytes"] == 28
+    assert summary["dtypes"]["F16"] == {"parameters": 6, "bytes": 12}
+
+
+def test_parse_header_rejects_truncated_and_oversized_input():
+    with pytest.raises(ValueError):
+        parse_header(b"\x01")
+    with pytest.raises(ValueError):
+        parse_header(encode_header({"a": 1})[:-1])
+    with pytest.raises(ValueError):
+        parse_header(struct.pack("<Q", 2 ** 40))
+
+
+def test_combine_summaries_adds_dtypes():
+    one = {"parameters": 2, "bytes": 4, "dtypes": {"F16": {"parameters": 2, "bytes": 4}}}
+    assert combine_summaries([one, one])["dtypes"]["F16"] == {"parameters": 4, "bytes": 8}
+
+
+def test_duplicate_copies_are_alternates():
+    filenames = ["model-00001-of-00002.safetensors", "model-00002-of-00002.safetensors",
+                 "consolidated.safetensors", "model.fp16.safetensors",
+                 "original/model.safetensors"]
+    indexes = {"model.safetensors.index.json": {"weight_map": {
+        "a": "model-00001-of-00002.safetensors", "b": "model-00002-of-00002.safetensors"}}}
+    primary, alternates = group_shards(filenames, indexes)
+    assert primary == [("model.safetensors.index.json",
+                        ["model-00001-of-00002.safetensors", "model-00002-of-00002.safetensors"])]
+    assert sorted(name for name, _ in alternates) == ["consolidated", "model.fp16",
+                                                      "original/model"]
+
+
+def test_pipeline_components_are_summed():
+    filenames = ["unet/diffusion_pytorch_model.safetensors",
+                 "unet/diffusion_pytorch_model.fp16.safetensors",
+                 "vae/diffusion_pytorch_model.safetensors",
+                 "text_encoder/model.safetensors",
+                 "safety_checker/model.safetensors",
+                 "v1-5-pruned.safetensors"]
+    primary, alternates = group_shards(filenames, {}, pipeline=True)
+    assert sorted(name for name, _ in primary) == [
+        "safety_checker/model", "text_encoder/model",
+        "unet/diffusion_pytorch_model", "vae/diffusion_pytorch_model"]
+    assert sorted(name for name, _ in alternates) == [
+        "unet/diffusion_pytorch_model.fp16", "v1-5-pruned"]
+
+
+def test_pipeline_without_component_weights_uses_top_level_set():
+    primary, alternates = group_shards(["model.safetensors"], {}, pipeline=True)
+    assert primary == [("model", ["model.safetensors"])]
+    assert alternates == []